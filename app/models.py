@@ -1,4 +1,4 @@
-from sqlmodel import SQLModel, Field
+from sqlmodel import SQLModel, Field, Index
 from datetime import datetime
 from typing import Optional
 
@@ -7,11 +7,13 @@ class TodoItem(SQLModel, table=True):
     """Persistent todo item model stored in database"""
 
     __tablename__ = "todo_items"  # type: ignore[assignment]
+    # Serves the pending/completed lists, each ordered by creation date and then id
+    __table_args__ = (Index("ix_todo_items_completed_created_at_id", "completed", "created_at", "id"),)
 
     id: Optional[int] = Field(default=None, primary_key=True)
     description: str = Field(max_length=500)
     completed: bool = Field(default=False)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
     updated_at: Optional[datetime] = Field(default=None)
 
 
@@ -1,26 +1,122 @@
-from typing import List, Optional
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, cast
 from datetime import datetime
-from sqlmodel import select, desc
+from sqlalchemy import CursorResult
+from sqlmodel import Session, and_, col, or_, select, update, delete, desc, func, case, not_
 from app.database import get_session
 from app.models import TodoItem, TodoItemCreate, TodoItemUpdate
 
+# Statements are built once so SQLAlchemy's compiled cache is hit on every call
+# Ties on created_at are broken by id, so pages neither repeat nor skip todos created together
+_ALL_TODOS_STMT = select(TodoItem).order_by(desc(TodoItem.created_at), desc(col(TodoItem.id)))
+_STATS_STMT = select(func.count(col(TodoItem.id)), func.sum(case((TodoItem.completed, 1), else_=0)))
+
+# Position of a todo in the list, as (created_at, id)
+TodoCursor = Tuple[datetime, int]
+# Todo lists are keyed by (completed, limit, offset, after)
+TodoKey = Tuple[Optional[bool], Optional[int], int, Optional[TodoCursor]]
+
+# Reads are served from memory until the next write through this module. Cached results are
+# shared between callers, so they must not be modified.
+_todos: Dict[TodoKey, List[TodoItem]] = {}
+# (total, completed), seeded by one aggregate query and then adjusted by each write
+_counts: Optional[Tuple[int, int]] = None
+# Bumped when a write starts and ends, reads don't cache what they loaded if a write happened meanwhile
+_generation = 0
+# Writes in progress, a read running alongside one may or may not see it so it isn't cached either
+_writes_in_progress = 0
+_cache_lock = threading.Lock()
+
+
+@dataclass
+class _CountChange:
+    """How a write changed the counts, recount when that is unknown"""
+
+    total: int = 0
+    completed: int = 0
+    recount: bool = False
+
+
+def invalidate_cache() -> None:
+    """Drop cached todos and stats, e.g. after the database was changed directly"""
+    global _counts, _generation
+    with _cache_lock:
+        _todos.clear()
+        _counts = None
+        _generation += 1
+
+
+@contextmanager
+def _write() -> Iterator[_CountChange]:
+    """Track a write to the database, dropping cached todos and applying its count change once it is done"""
+    global _counts, _generation, _writes_in_progress
+    with _cache_lock:
+        _writes_in_progress += 1
+        _generation += 1
+
+    change = _CountChange()
+    try:
+        yield change
+    except BaseException:
+        # Whether the write was committed is unknown
+        change.recount = True
+        raise
+    finally:
+        with _cache_lock:
+            _writes_in_progress -= 1
+            _generation += 1
+            _todos.clear()
+            if change.recount or _counts is None:
+                _counts = None
+            else:
+                total, completed = _counts
+                _counts = (total + change.total, completed + change.completed)
+
 
 def create_todo(todo_data: TodoItemCreate) -> TodoItem:
     """Create a new todo item"""
-    with get_session() as session:
-        todo = TodoItem(description=todo_data.description)
+    return create_todo_from_str(todo_data.description)
+
+
+def create_todo_from_str(description: str) -> TodoItem:
+    """Create a new todo item from an already validated description, skipping TodoItemCreate validation"""
+    with _write() as change, get_session() as session:
+        todo = TodoItem(description=description)
         session.add(todo)
         session.commit()
-        session.refresh(todo)
-        return todo
+        change.total = 1
 
+    return todo
+
+
+def create_todos_bulk(items: List[TodoItemCreate]) -> List[TodoItem]:
+    """Create many todo items in a single transaction"""
+    with _write() as change, get_session() as session:
+        todos = [TodoItem(description=item.description) for item in items]
+        session.add_all(todos)
+        session.commit()
+        change.total = len(todos)
+
+    return todos
 
-def get_all_todos() -> List[TodoItem]:
-    """Get all todo items ordered by creation date"""
-    with get_session() as session:
-        statement = select(TodoItem).order_by(desc(TodoItem.created_at))
-        todos = session.exec(statement).all()
-        return list(todos)
+
+def get_all_todos(
+    limit: Optional[int] = None,
+    offset: int = 0,
+    after: Optional[TodoCursor] = None,
+    completed: Optional[bool] = None,
+) -> List[TodoItem]:
+    """Get todo items ordered by creation date, optionally a single page, those after a position or with a status"""
+    (todos,), _ = _read([(completed, limit, offset, after)])
+    return todos
+
+
+def get_todos_grouped(limit: Optional[int] = None) -> Tuple[List[TodoItem], List[TodoItem], dict]:
+    """Get pending and completed todo items, each ordered by creation date, and todo stats in a single session"""
+    (pending, completed), stats = _read([(False, limit, 0, None), (True, limit, 0, None)], with_stats=True)
+    return pending, completed, stats
 
 
 def get_todo_by_id(todo_id: int) -> Optional[TodoItem]:
@@ -31,55 +127,137 @@ def get_todo_by_id(todo_id: int) -> Optional[TodoItem]:
 
 def update_todo(todo_id: int, update_data: TodoItemUpdate) -> Optional[TodoItem]:
     """Update a todo item"""
-    with get_session() as session:
-        todo = session.get(TodoItem, todo_id)
-        if todo is None:
-            return None
+    values = update_data.model_dump(exclude_none=True)
+    values["updated_at"] = datetime.utcnow()
 
-        if update_data.description is not None:
-            todo.description = update_data.description
-        if update_data.completed is not None:
-            todo.completed = update_data.completed
+    with _write() as change, get_session() as session:
+        todo = _update_returning(session, todo_id, values)
+        # The status the todo had before is unknown, so it is counted again
+        change.recount = todo is not None and update_data.completed is not None
 
-        todo.updated_at = datetime.utcnow()
-        session.add(todo)
-        session.commit()
-        session.refresh(todo)
-        return todo
+    return todo
 
 
 def toggle_todo_completion(todo_id: int) -> Optional[TodoItem]:
     """Toggle the completion status of a todo item"""
-    with get_session() as session:
+    values = {"completed": not_(TodoItem.completed), "updated_at": datetime.utcnow()}
+
+    with _write() as change, get_session() as session:
+        todo = _update_returning(session, todo_id, values)
+        if todo is not None:
+            change.completed = 1 if todo.completed else -1
+
+    return todo
+
+
+def _update_returning(session: Session, todo_id: int, values: dict) -> Optional[TodoItem]:
+    """Apply a single UPDATE to a todo item and return its new state"""
+    statement = update(TodoItem).where(col(TodoItem.id) == todo_id).values(**values)
+
+    # Session.exec only accepts SELECTs, DML statements go through execute
+    todo: Optional[TodoItem]
+    if session.get_bind().dialect.update_returning:
+        todo = session.execute(statement.returning(TodoItem)).scalars().one_or_none()
+    else:
+        session.execute(statement)
         todo = session.get(TodoItem, todo_id)
-        if todo is None:
-            return None
 
-        todo.completed = not todo.completed
-        todo.updated_at = datetime.utcnow()
-        session.add(todo)
-        session.commit()
-        session.refresh(todo)
-        return todo
+    session.commit()
+    return todo
 
 
 def delete_todo(todo_id: int) -> bool:
     """Delete a todo item"""
-    with get_session() as session:
-        todo = session.get(TodoItem, todo_id)
-        if todo is None:
-            return False
+    statement = delete(TodoItem).where(col(TodoItem.id) == todo_id)
 
-        session.delete(todo)
+    with _write() as change, get_session() as session:
+        completed: Optional[bool]
+        if session.get_bind().dialect.delete_returning:
+            completed = session.execute(statement.returning(col(TodoItem.completed))).scalar_one_or_none()
+            deleted = completed is not None
+        else:
+            # Without RETURNING the deleted todo's status is unknown, so it is counted again
+            completed = None
+            deleted = cast(CursorResult, session.execute(statement)).rowcount == 1
         session.commit()
-        return True
+        if deleted:
+            change.total = -1
+            change.completed = -1 if completed else 0
+            change.recount = completed is None
+
+    return deleted
 
 
 def get_todo_stats() -> dict:
-    """Get statistics about todos"""
-    todos = get_all_todos()
-    total = len(todos)
-    completed = sum(1 for todo in todos if todo.completed)
+    """Get statistics about todos
+
+    Counts are kept per process, seeded by one aggregate query and then adjusted by writes through this module.
+    They never reseed on their own: writes from another process leave them wrong until update_todo is called
+    with a completed value or invalidate_cache() is.
+    """
+    _, stats = _read([], with_stats=True)
+    return stats
+
+
+def _read(keys: Sequence[TodoKey], with_stats: bool = False) -> Tuple[List[List[TodoItem]], dict]:
+    """Return cached todo lists and, if asked for, stats (else an empty dict), loading misses in one session"""
+    with _cache_lock:
+        todos = {key: _todos[key] for key in keys if key in _todos}
+        counts, generation = _counts, _generation
+
+    missing = [key for key in keys if key not in todos]
+    load_counts = with_stats and counts is None
+    if missing or load_counts:
+        with get_session() as session:
+            loaded = {key: _load_todos(session, *key) for key in missing}
+            if load_counts:
+                counts = _load_counts(session)
+        _store(generation, loaded, counts if load_counts else None)
+        todos.update(loaded)
+
+    return [todos[key] for key in keys], _build_stats(*counts) if with_stats and counts is not None else {}
+
+
+def _load_todos(
+    session: Session, completed: Optional[bool], limit: Optional[int], offset: int, after: Optional[TodoCursor]
+) -> List[TodoItem]:
+    statement = _ALL_TODOS_STMT
+    if completed is not None:
+        statement = statement.where(col(TodoItem.completed) == completed)
+    if after is not None:
+        created_at, todo_id = after
+        statement = statement.where(
+            or_(
+                col(TodoItem.created_at) < created_at,
+                and_(col(TodoItem.created_at) == created_at, col(TodoItem.id) < todo_id),
+            )
+        )
+    if limit is not None:
+        statement = statement.limit(limit)
+    if offset:
+        statement = statement.offset(offset)
+    # Result.all() already builds a list, it is only typed as a Sequence
+    return cast(List[TodoItem], session.exec(statement).all())
+
+
+def _load_counts(session: Session) -> Tuple[int, int]:
+    total, completed = session.exec(_STATS_STMT).one()
+    # SUM over an empty table is NULL
+    return total, completed or 0
+
+
+def _store(generation: int, todos: Dict[TodoKey, List[TodoItem]], counts: Optional[Tuple[int, int]]) -> None:
+    """Cache what a read loaded, unless a write since the read started may be missing from it"""
+    global _counts
+    with _cache_lock:
+        if _generation != generation or _writes_in_progress:
+            return
+        _todos.update(todos)
+        if counts is not None:
+            _counts = counts
+
+
+def _build_stats(total: int, completed: int) -> dict:
     pending = total - completed
 
     return {
@@ -1,6 +1,20 @@
+from datetime import date, datetime
+from functools import lru_cache
 from nicegui import ui
-from app.todo_service import create_todo, get_all_todos, toggle_todo_completion, delete_todo, get_todo_stats
-from app.models import TodoItemCreate, TodoItem
+from app.todo_service import (
+    create_todo_from_str,
+    get_all_todos,
+    get_todos_grouped,
+    toggle_todo_completion,
+    delete_todo,
+    get_todo_stats,
+)
+from app.models import TodoItem
+
+# Number of todo cards rendered up front and per lazy-loaded page
+TODO_PAGE_SIZE = 50
+# Delay in seconds used to coalesce stats refreshes from bursts of changes
+STATS_REFRESH_DELAY = 0.05
 
 
 # Modern color theme
@@ -16,19 +30,31 @@ def apply_modern_theme():
     )
 
 
-def create_metric_card(title: str, value: str, icon: str, color: str = "primary"):
-    """Create a metric card component"""
+def create_metric_card(title: str, value: str, icon: str, color: str = "primary") -> ui.label:
+    """Create a metric card component and return its value label"""
     with ui.card().classes("p-6 bg-white shadow-lg rounded-xl hover:shadow-xl transition-shadow min-w-32"):
         with ui.row().classes("items-center gap-4"):
             ui.icon(icon).classes(f"text-{color} text-2xl")
             with ui.column().classes("gap-1"):
-                ui.label(value).classes("text-2xl font-bold text-gray-800")
+                value_label = ui.label(value).classes("text-2xl font-bold text-gray-800")
                 ui.label(title).classes("text-sm text-gray-500 uppercase tracking-wider")
+    return value_label
 
 
-def create_todo_item_card(todo: TodoItem, on_change_callback):
+def todo_position(todo: TodoItem) -> tuple[datetime, int]:
+    """Position of a todo in the list, which is ordered by creation date and then id, newest first"""
+    return todo.created_at, todo.id or 0
+
+
+@lru_cache(maxsize=1024)
+def format_created_date(created_on: date) -> str:
+    """Format a creation date for display, cached per day so todos created on the same day share an entry"""
+    return created_on.strftime("%b %d, %Y")
+
+
+def create_todo_item_card(todo: TodoItem, on_toggled, on_deleted) -> ui.card:
     """Create a todo item card component"""
-    with ui.card().classes("w-full p-4 shadow-md rounded-lg hover:shadow-lg transition-shadow"):
+    with ui.card().classes("w-full p-4 shadow-md rounded-lg hover:shadow-lg transition-shadow") as card:
         with ui.row().classes("items-center gap-4 w-full"):
             # Checkbox for completion status
             checkbox = ui.checkbox(value=todo.completed).classes("text-lg")
@@ -41,19 +67,20 @@ def create_todo_item_card(todo: TodoItem, on_change_callback):
             ui.label(todo.description).classes(description_classes)
 
             # Created date
-            created_date = todo.created_at.strftime("%b %d, %Y")
-            ui.label(created_date).classes("text-sm text-gray-500 min-w-fit")
+            ui.label(format_created_date(todo.created_at.date())).classes("text-sm text-gray-500 min-w-fit")
 
             # Delete button
             ui.button(
-                icon="delete", on_click=lambda e, todo_id=todo.id: delete_todo_item(todo_id, on_change_callback)
+                icon="delete", on_click=lambda e, todo_id=todo.id: delete_todo_item(todo_id, on_deleted)
             ).classes("text-red-500 hover:bg-red-50").props("flat round size=sm")
 
             # Handle checkbox changes
-            checkbox.on("update:model-value", lambda e, todo_id=todo.id: toggle_todo_item(todo_id, on_change_callback))
+            checkbox.on("update:model-value", lambda e, todo_id=todo.id: toggle_todo_item(todo_id, on_toggled))
+
+    return card
 
 
-def delete_todo_item(todo_id: int | None, on_change_callback):
+def delete_todo_item(todo_id: int | None, on_deleted):
     """Delete a todo item with confirmation"""
     if todo_id is None:
         return
@@ -61,12 +88,12 @@ def delete_todo_item(todo_id: int | None, on_change_callback):
     success = delete_todo(todo_id)
     if success:
         ui.notify("Todo item deleted successfully!", type="positive")
-        on_change_callback()
+        on_deleted(todo_id)
     else:
         ui.notify("Failed to delete todo item", type="negative")
 
 
-def toggle_todo_item(todo_id: int | None, on_change_callback):
+def toggle_todo_item(todo_id: int | None, on_toggled):
     """Toggle todo completion status"""
     if todo_id is None:
         return
@@ -75,17 +102,18 @@ def toggle_todo_item(todo_id: int | None, on_change_callback):
     if updated_todo:
         status = "completed" if updated_todo.completed else "reopened"
         ui.notify(f"Todo item {status}!", type="positive")
-        on_change_callback()
+        on_toggled(updated_todo)
     else:
         ui.notify("Failed to update todo item", type="negative")
 
 
 def create():
     """Create the todo application UI"""
-    apply_modern_theme()
 
     @ui.page("/")
     def todo_app():
+        apply_modern_theme()
+
         # Page title and styling
         ui.add_head_html("""
         <style>
@@ -108,8 +136,14 @@ def create():
             ui.label("✅ Todo Manager").classes("text-4xl font-bold text-gray-800 mb-2 text-center")
             ui.label("Organize your tasks efficiently").classes("text-lg text-gray-600 mb-8 text-center")
 
-            # Stats cards container
-            stats_container = ui.row().classes("gap-4 mb-8 justify-center")
+            # Stats cards
+            with ui.row().classes("gap-4 mb-8 justify-center") as stats_row:
+                stat_labels = {
+                    "total": create_metric_card("Total Tasks", "0", "task_alt", "primary"),
+                    "completed": create_metric_card("Completed", "0", "check_circle", "positive"),
+                    "pending": create_metric_card("Pending", "0", "pending", "warning"),
+                    "completion_rate": create_metric_card("Progress", "0%", "trending_up", "info"),
+                }
 
             # Add todo form
             with ui.card().classes("glass-card p-6 shadow-lg rounded-xl mb-8"):
@@ -121,63 +155,162 @@ def create():
                     )
 
                     ui.button(
-                        "Add Todo", icon="add", on_click=lambda: add_new_todo(new_todo_input, refresh_todos)
+                        "Add Todo", icon="add", on_click=lambda: add_new_todo(new_todo_input, on_todo_added)
                     ).classes("bg-primary text-white px-6 py-3 rounded-lg shadow-md hover:shadow-lg")
 
                 # Handle Enter key
-                new_todo_input.on("keydown.enter", lambda: add_new_todo(new_todo_input, refresh_todos))
+                new_todo_input.on("keydown.enter", lambda: add_new_todo(new_todo_input, on_todo_added))
 
             # Todo list container
-            todo_list_container = ui.column().classes("gap-4 w-full")
-
-            def refresh_todos():
-                """Refresh the todo list and stats"""
-                # Clear current todos
-                todo_list_container.clear()
-                stats_container.clear()
-
-                # Get updated data
-                todos = get_all_todos()
-                stats = get_todo_stats()
-
-                # Update stats cards
-                with stats_container:
-                    create_metric_card("Total Tasks", str(stats["total"]), "task_alt", "primary")
-                    create_metric_card("Completed", str(stats["completed"]), "check_circle", "positive")
-                    create_metric_card("Pending", str(stats["pending"]), "pending", "warning")
-                    create_metric_card("Progress", f"{stats['completion_rate']}%", "trending_up", "info")
-
-                # Update todo list
-                with todo_list_container:
-                    if not todos:
-                        with ui.card().classes("p-8 text-center bg-gray-50 rounded-lg"):
-                            ui.icon("task_alt").classes("text-6xl text-gray-300 mb-4")
-                            ui.label("No todos yet!").classes("text-xl text-gray-500 mb-2")
-                            ui.label("Add your first todo above to get started.").classes("text-gray-400")
-                    else:
-                        ui.label(f"Your Tasks ({len(todos)})").classes("text-lg font-semibold text-gray-700 mb-4")
-
-                        # Separate completed and pending todos
-                        pending_todos = [todo for todo in todos if not todo.completed]
-                        completed_todos = [todo for todo in todos if todo.completed]
-
-                        # Show pending todos first
-                        if pending_todos:
-                            ui.label("Pending").classes("text-md font-medium text-gray-600 mb-2")
-                            for todo in pending_todos:
-                                create_todo_item_card(todo, refresh_todos)
-
-                        # Show completed todos
-                        if completed_todos:
-                            ui.label("Completed").classes("text-md font-medium text-gray-600 mb-2 mt-6")
-                            for todo in completed_todos:
-                                create_todo_item_card(todo, refresh_todos)
-
-            # Initial load
-            refresh_todos()
-
-
-def add_new_todo(input_field, refresh_callback):
+            with ui.column().classes("gap-4 w-full"):
+                with ui.card().classes("p-8 text-center bg-gray-50 rounded-lg") as empty_card:
+                    ui.icon("task_alt").classes("text-6xl text-gray-300 mb-4")
+                    ui.label("No todos yet!").classes("text-xl text-gray-500 mb-2")
+                    ui.label("Add your first todo above to get started.").classes("text-gray-400")
+
+                tasks_label = ui.label().classes("text-lg font-semibold text-gray-700 mb-4")
+
+                # Pending todos are shown first, then completed ones; further pages load when scrolled to the bottom
+                with ui.scroll_area(on_scroll=lambda e: load_more() if e.vertical_percentage > 0.9 else None).classes(
+                    "w-full h-[70vh]"
+                ) as todo_scroll_area:
+                    pending_label = ui.label("Pending").classes("text-md font-medium text-gray-600 mb-2")
+                    pending_list = ui.column().classes("gap-4 w-full")
+                    completed_label = ui.label("Completed").classes("text-md font-medium text-gray-600 mb-2 mt-6")
+                    completed_list = ui.column().classes("gap-4 w-full")
+
+            # Rendered todos and their cards by todo id, patched on every change instead of re-rendered
+            todos: dict[int, TodoItem] = {}
+            todo_cards: dict[int, ui.card] = {}
+            # Per section, keyed by completed status: where the next page starts and whether every todo is rendered.
+            # Pages start after the last loaded todo, so todos added or deleted meanwhile don't shift them.
+            next_page_after: dict[bool, tuple[datetime, int] | None] = {False: None, True: None}
+            fully_loaded = {False: False, True: False}
+
+            def update_stats(stats: dict):
+                """Update stats cards and the task count in place"""
+                stat_labels["total"].set_text(str(stats["total"]))
+                stat_labels["completed"].set_text(str(stats["completed"]))
+                stat_labels["pending"].set_text(str(stats["pending"]))
+                stat_labels["completion_rate"].set_text(f"{stats['completion_rate']}%")
+
+                empty_card.set_visibility(stats["total"] == 0)
+                tasks_label.set_visibility(stats["total"] > 0)
+                tasks_label.set_text(f"Your Tasks ({stats['total']})")
+                todo_scroll_area.set_visibility(stats["total"] > 0)
+
+            def update_section_labels():
+                """Show section headers only above sections with rendered cards"""
+                pending_label.set_visibility(bool(pending_list.default_slot.children))
+                completed_label.set_visibility(bool(completed_list.default_slot.children))
+
+            # Changes made while a refresh is scheduled just join it instead of scheduling another
+            stats_refresh_pending = False
+
+            def refresh_stats():
+                nonlocal stats_refresh_pending
+                stats_refresh_pending = False
+                update_stats(get_todo_stats())
+
+            def schedule_stats_refresh():
+                """Refresh the stats once shortly after a burst of changes"""
+                nonlocal stats_refresh_pending
+                if stats_refresh_pending:
+                    return
+                stats_refresh_pending = True
+                # Created in the stats row, since the slot of the card that triggered it may be deleted
+                with stats_row:
+                    ui.timer(STATS_REFRESH_DELAY, refresh_stats, once=True)
+
+            def render_card(todo: TodoItem, index: int = -1):
+                """Render a card for a todo at the given position within its section"""
+                if todo.id is None:
+                    return
+                if todo.id in todo_cards:
+                    # A todo toggled by another client shows up again in the other section's pages
+                    remove_card(todo.id)
+
+                section = completed_list if todo.completed else pending_list
+                with section:
+                    card = create_todo_item_card(todo, on_todo_toggled, on_todo_deleted)
+                if index >= 0:
+                    card.move(section, target_index=index)
+
+                todos[todo.id] = todo
+                todo_cards[todo.id] = card
+
+            def insert_card(todo: TodoItem):
+                """Render a card for a todo, keeping its section ordered newest first"""
+                position = todo_position(todo)
+                # Todos past the last loaded one of a partially loaded section come with a later page
+                after = next_page_after[todo.completed]
+                if not fully_loaded[todo.completed] and (after is None or position < after):
+                    return
+
+                index = sum(
+                    1
+                    for other in todos.values()
+                    if other.completed == todo.completed and todo_position(other) > position
+                )
+                render_card(todo, index)
+
+            def render_page(completed: bool, page: list[TodoItem]):
+                """Append a page of todos to their section, pages arrive newest first"""
+                for todo in page:
+                    render_card(todo)
+                if page:
+                    next_page_after[completed] = todo_position(page[-1])
+                fully_loaded[completed] = len(page) < TODO_PAGE_SIZE
+
+            def remove_card(todo_id: int):
+                """Remove a todo's card if it is rendered"""
+                todos.pop(todo_id, None)
+                card = todo_cards.pop(todo_id, None)
+                if card is not None:
+                    card.delete()
+
+            def on_todo_added(todo: TodoItem):
+                insert_card(todo)
+                update_section_labels()
+                schedule_stats_refresh()
+
+            def on_todo_toggled(todo: TodoItem):
+                # The card changes section, so only this one card is rebuilt
+                if todo.id is not None:
+                    remove_card(todo.id)
+                insert_card(todo)
+                update_section_labels()
+                schedule_stats_refresh()
+
+            def load_more():
+                """Render the next page of todos, finishing pending ones before completed ones"""
+                for completed in (False, True):
+                    if fully_loaded[completed]:
+                        continue
+                    page = get_all_todos(limit=TODO_PAGE_SIZE, after=next_page_after[completed], completed=completed)
+                    render_page(completed, page)
+                    if not fully_loaded[completed]:
+                        break
+                update_section_labels()
+
+            def on_todo_deleted(todo_id: int):
+                remove_card(todo_id)
+                update_section_labels()
+                schedule_stats_refresh()
+                # Deleting may leave too few cards to scroll, so top up the first page
+                if len(todos) < TODO_PAGE_SIZE:
+                    load_more()
+
+            # Initial load, completed todos are only shown once all pending ones are
+            pending_page, completed_page, stats = get_todos_grouped(limit=TODO_PAGE_SIZE)
+            render_page(False, pending_page)
+            if fully_loaded[False]:
+                render_page(True, completed_page)
+            update_section_labels()
+            update_stats(stats)
+
+
+def add_new_todo(input_field, on_added):
     """Add a new todo item"""
     description = input_field.value.strip()
 
@@ -190,10 +323,9 @@ def add_new_todo(input_field, refresh_callback):
         return
 
     try:
-        todo_data = TodoItemCreate(description=description)
-        create_todo(todo_data)
+        todo = create_todo_from_str(description)
         input_field.set_value("")  # Clear the input
         ui.notify("Todo added successfully!", type="positive")
-        refresh_callback()
+        on_added(todo)
     except Exception as e:
         ui.notify(f"Failed to add todo: {str(e)}", type="negative")
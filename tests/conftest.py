@@ -1,7 +1,14 @@
+import os
 from typing import Generator
 import pytest
-from app.startup import startup
-from nicegui.testing import User
+
+# Run tests against an in-memory database unless another one is requested, must happen before app imports
+os.environ["APP_DATABASE_URL"] = os.environ.get("APP_TEST_DATABASE_URL", "sqlite://")
+
+from app.database import create_tables, reset_db  # noqa: E402
+from app.startup import startup  # noqa: E402
+from app.todo_service import invalidate_cache  # noqa: E402
+from nicegui.testing import User  # noqa: E402
 
 pytest_plugins = ['nicegui.testing.plugin']
 
@@ -10,3 +17,21 @@ pytest_plugins = ['nicegui.testing.plugin']
 def user(user: User) -> Generator[User, None, None]:
     startup()
     yield user
+
+
+def reset_todos():
+    """Wipe all todos and the service cache that would otherwise still serve them"""
+    reset_db()
+    invalidate_cache()
+
+
+@pytest.fixture(scope="session")
+def clean_db():
+    create_tables()
+    reset_todos()
+
+
+@pytest.fixture()
+def new_db(clean_db):
+    yield
+    reset_todos()
@@ -1,6 +1,7 @@
 """Smoke test for SQLModel database setup."""
 import pytest
-from sqlmodel import SQLModel, text
+from sqlalchemy import inspect
+from sqlmodel import SQLModel
 
 from app.database import create_tables, ENGINE
 from app import models
@@ -12,12 +13,7 @@ def test_sqlmodel_smoke():
     create_tables()
     
     # Check tables actually exist in the database
-    with ENGINE.connect() as conn:
-        # PostgreSQL-specific query to list tables
-        result = conn.execute(text(
-            "SELECT tablename FROM pg_tables WHERE schemaname = 'public'"
-        ))
-        db_tables = {row[0] for row in result}
+    db_tables = set(inspect(ENGINE).get_table_names())
     
     # Verify we have tables and they match our models
     assert len(db_tables) > 0, "No tables found in database"
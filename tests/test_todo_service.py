@@ -1,22 +1,21 @@
-import pytest
-from app.database import reset_db
+from datetime import datetime
+from sqlalchemy import event
+from app import todo_service
+from app.database import get_session
 from app.todo_service import (
     create_todo,
+    create_todo_from_str,
+    create_todos_bulk,
     get_all_todos,
     get_todo_by_id,
     update_todo,
     toggle_todo_completion,
     delete_todo,
     get_todo_stats,
+    get_todos_grouped,
+    invalidate_cache,
 )
-from app.models import TodoItemCreate, TodoItemUpdate
-
-
-@pytest.fixture()
-def new_db():
-    reset_db()
-    yield
-    reset_db()
+from app.models import TodoItem, TodoItemCreate, TodoItemUpdate
 
 
 def test_create_todo(new_db):
@@ -41,6 +40,26 @@ def test_create_todo_with_long_description(new_db):
     assert len(todo.description) == 500
 
 
+def test_create_todo_from_str(new_db):
+    """Test creating a todo item from a plain description"""
+    todo = create_todo_from_str("Plain todo")
+
+    assert todo.id is not None
+    assert todo.description == "Plain todo"
+    assert todo.completed is False
+    assert get_all_todos()[0].id == todo.id
+
+
+def test_create_todos_bulk(new_db):
+    """Test creating several todo items at once"""
+    todos = create_todos_bulk([TodoItemCreate(description=f"Todo {i}") for i in range(3)])
+
+    assert [todo.description for todo in todos] == ["Todo 0", "Todo 1", "Todo 2"]
+    assert all(todo.id is not None for todo in todos)
+    assert len({todo.id for todo in todos}) == 3
+    assert len(get_all_todos()) == 3
+
+
 def test_get_all_todos_empty(new_db):
     """Test getting all todos when none exist"""
     todos = get_all_todos()
@@ -61,6 +80,67 @@ def test_get_all_todos_with_items(new_db):
     assert todos[1].id == todo1.id
 
 
+def test_get_all_todos_paginated(new_db):
+    """Test getting todos one page at a time"""
+    todo1 = create_todo(TodoItemCreate(description="First todo"))
+    todo2 = create_todo(TodoItemCreate(description="Second todo"))
+    todo3 = create_todo(TodoItemCreate(description="Third todo"))
+
+    first_page = get_all_todos(limit=2)
+    assert [todo.id for todo in first_page] == [todo3.id, todo2.id]
+
+    second_page = get_all_todos(limit=2, offset=2)
+    assert [todo.id for todo in second_page] == [todo1.id]
+
+    assert get_all_todos(limit=2, offset=4) == []
+
+
+def test_get_all_todos_after_position(new_db):
+    """Test paging from the last todo of a page, with todos created at the same time ordered by id"""
+    created_at = datetime(2024, 1, 1)
+    with get_session() as session:
+        todos = [TodoItem(description=f"Todo {i}", created_at=created_at) for i in range(3)]
+        session.add_all(todos)
+        session.commit()
+    invalidate_cache()
+    ids = sorted((todo.id for todo in todos if todo.id is not None), reverse=True)
+
+    first_page = get_all_todos(limit=2)
+    assert [todo.id for todo in first_page] == ids[:2]
+
+    # A todo added after the first page was fetched doesn't shift the next one
+    create_todo(TodoItemCreate(description="Added later"))
+    last = first_page[-1]
+    assert last.id is not None
+    second_page = get_all_todos(limit=2, after=(last.created_at, last.id))
+    assert [todo.id for todo in second_page] == ids[2:]
+
+
+def test_get_todos_grouped(new_db):
+    """Test getting pending and completed todos separately"""
+    todo1 = create_todo(TodoItemCreate(description="First todo"))
+    todo2 = create_todo(TodoItemCreate(description="Second todo"))
+    todo3 = create_todo(TodoItemCreate(description="Third todo"))
+
+    if todo1.id is not None:
+        toggle_todo_completion(todo1.id)
+    if todo3.id is not None:
+        toggle_todo_completion(todo3.id)
+
+    pending, completed, stats = get_todos_grouped()
+    assert [todo.id for todo in pending] == [todo2.id]
+    assert [todo.id for todo in completed] == [todo3.id, todo1.id]
+    assert stats == get_todo_stats()
+    assert stats["completed"] == 2
+
+    assert get_all_todos(completed=True, limit=1, offset=1) == completed[1:]
+
+    # Stats always cover all todos, even when only the first page is fetched
+    pending, completed, stats = get_todos_grouped(limit=1)
+    assert [todo.id for todo in completed] == [todo3.id]
+    assert stats["total"] == 3
+
+
 def test_get_todo_by_id_exists(new_db):
     """Test getting a todo by ID when it exists"""
     todo = create_todo(TodoItemCreate(description="Test todo"))
@@ -193,9 +273,7 @@ def test_get_todo_stats_empty(new_db):
 def test_get_todo_stats_with_todos(new_db):
     """Test getting stats with mixed todo statuses"""
     # Create todos with different completion statuses
-    todo1 = create_todo(TodoItemCreate(description="Todo 1"))
-    todo2 = create_todo(TodoItemCreate(description="Todo 2"))
-    create_todo(TodoItemCreate(description="Todo 3"))
+    todo1, todo2, _ = create_todos_bulk([TodoItemCreate(description=f"Todo {i}") for i in range(1, 4)])
 
     # Complete some todos
     if todo1.id is not None:
@@ -213,8 +291,7 @@ def test_get_todo_stats_with_todos(new_db):
 
 def test_get_todo_stats_all_completed(new_db):
     """Test getting stats when all todos are completed"""
-    todo1 = create_todo(TodoItemCreate(description="Todo 1"))
-    todo2 = create_todo(TodoItemCreate(description="Todo 2"))
+    todo1, todo2 = create_todos_bulk([TodoItemCreate(description="Todo 1"), TodoItemCreate(description="Todo 2")])
 
     # Complete all todos
     if todo1.id is not None:
@@ -260,3 +337,83 @@ def test_todo_timestamps(new_db):
         assert updated.created_at == todo.created_at  # Should not change
         assert updated.updated_at is not None  # Should be set
         assert updated.updated_at > todo.created_at  # Should be more recent
+
+
+def test_reads_are_cached_until_write(new_db):
+    """Test that cached todos and stats are refreshed after a write"""
+    todo = create_todo(TodoItemCreate(description="Cached todo"))
+
+    todos = get_all_todos()
+    assert get_all_todos() == todos
+    assert get_todo_stats()["completed"] == 0
+
+    if todo.id is not None:
+        toggle_todo_completion(todo.id)
+
+    todos = get_all_todos()
+    assert todos[0].completed is True
+    assert get_todo_stats()["completed"] == 1
+
+    if todo.id is not None:
+        delete_todo(todo.id)
+
+    assert get_all_todos() == []
+    assert get_todo_stats()["total"] == 0
+
+
+def test_read_overlapping_write_is_not_cached(new_db, monkeypatch):
+    """Test that a read racing a write doesn't leave stale todos in the cache"""
+    load_todos = todo_service._load_todos
+
+    def load_todos_then_write(*args):
+        todos = load_todos(*args)
+        monkeypatch.setattr(todo_service, "_load_todos", load_todos)
+        create_todo(TodoItemCreate(description="Written during read"))
+        return todos
+
+    monkeypatch.setattr(todo_service, "_load_todos", load_todos_then_write)
+
+    assert get_all_todos() == []
+    assert [todo.description for todo in get_all_todos()] == ["Written during read"]
+
+
+def test_stats_counts_follow_writes(new_db):
+    """Test that stats maintained by writes match a fresh count"""
+    assert get_todo_stats()["total"] == 0
+
+    todo1, todo2, todo3 = create_todos_bulk([TodoItemCreate(description=f"Todo {i}") for i in range(3)])
+    create_todo(TodoItemCreate(description="Todo 4"))
+    if todo1.id is not None:
+        toggle_todo_completion(todo1.id)
+    if todo2.id is not None:
+        update_todo(todo2.id, TodoItemUpdate(completed=True))
+        delete_todo(todo2.id)
+    if todo3.id is not None:
+        toggle_todo_completion(todo3.id)
+        toggle_todo_completion(todo3.id)
+        delete_todo(todo3.id)
+    delete_todo(999)
+
+    stats = get_todo_stats()
+    assert stats["total"] == 2
+    assert stats["completed"] == 1
+
+    invalidate_cache()
+    assert get_todo_stats() == stats
+
+
+def test_stats_read_during_write_are_not_counted_twice(new_db, monkeypatch):
+    """Test that counts loaded while a write is in progress don't already include it before it is applied"""
+    stats_during_write = []
+    service_get_session = todo_service.get_session
+
+    def get_session():
+        session = service_get_session()
+        event.listen(session, "after_commit", lambda _: stats_during_write.append(get_todo_stats()), once=True)
+        return session
+
+    monkeypatch.setattr(todo_service, "get_session", get_session)
+    create_todo(TodoItemCreate(description="Counted once"))
+
+    assert stats_during_write[0]["total"] == 1
+    assert get_todo_stats()["total"] == 1
@@ -0,0 +1,164 @@
+from nicegui import events, ui
+from nicegui.element import Element
+from nicegui.testing import User
+from nicegui.testing.user_interaction import UserInteraction
+from app import todo_service, todo_ui
+from app.models import TodoItemCreate
+from app.todo_service import create_todo, toggle_todo_completion
+from app.todo_ui import TODO_PAGE_SIZE
+
+
+def is_shown(element: Element) -> bool:
+    """Whether an element is visible, hiding a container also hides its children"""
+    return all(ancestor.visible for ancestor in (element, *element.ancestors()))
+
+
+def empty_state_shown(user: User) -> bool:
+    """Whether the placeholder for an empty todo list is shown"""
+    return is_shown(next(iter(user.find("No todos yet!").elements)))
+
+
+def shown_todos(user: User) -> list[str]:
+    """Section headers and todo descriptions in the order they are shown"""
+    tasks_label = next(iter(user.find("Your Tasks").elements))
+    assert tasks_label.parent_slot is not None
+    return [
+        element.text
+        for element in tasks_label.parent_slot.parent.descendants()
+        if isinstance(element, ui.label)
+        and element is not tasks_label
+        and "text-sm" not in element.classes  # creation dates
+        and is_shown(element)
+    ]
+
+
+def click_in_card(user: User, description: str, kind: type[Element]) -> None:
+    """Click the element of the given kind on the card of a todo"""
+    label = next(iter(user.find(description).elements))
+    card = next(ancestor for ancestor in label.ancestors() if isinstance(ancestor, ui.card))
+    element = next(element for element in card.descendants() if isinstance(element, kind))
+    UserInteraction(user, {element}, None).click()
+
+
+def scroll_to_bottom(user: User) -> None:
+    """Scroll the todo list to its end, UserInteraction.trigger can't pass the event's scroll position"""
+    scroll_area = next(iter(user.find(ui.scroll_area).elements))
+    args = {
+        "verticalPosition": 0,
+        "verticalPercentage": 1.0,
+        "verticalSize": 0,
+        "verticalContainerSize": 0,
+        "horizontalPosition": 0,
+        "horizontalPercentage": 0.0,
+        "horizontalSize": 0,
+        "horizontalContainerSize": 0,
+    }
+    with user.client:
+        for listener in scroll_area._event_listeners.values():
+            if listener.type == "scroll":
+                events.handle_event(
+                    listener.handler, events.GenericEventArguments(sender=scroll_area, client=user.client, args=args)
+                )
+
+
+async def test_add_todo(user: User, new_db) -> None:
+    """Test that an added todo is shown on top of its section"""
+    await user.open("/")
+    assert empty_state_shown(user)
+
+    user.find(ui.input).type("Buy milk")
+    user.find("Add Todo").click()
+
+    await user.should_see("Your Tasks (1)")
+    assert not empty_state_shown(user)
+    assert shown_todos(user) == ["Pending", "Buy milk"]
+
+    # New todos are the newest, so they go on top
+    user.find(ui.input).type("Walk the dog")
+    user.find("Add Todo").click()
+
+    await user.should_see("Your Tasks (2)")
+    assert shown_todos(user) == ["Pending", "Walk the dog", "Buy milk"]
+
+
+async def test_stats_refresh_once_after_burst_of_changes(user: User, new_db, monkeypatch) -> None:
+    """Test that stats are reloaded once for several changes in quick succession"""
+    stats_reads = []
+
+    def get_todo_stats():
+        stats_reads.append(None)
+        return todo_service.get_todo_stats()
+
+    await user.open("/")
+    monkeypatch.setattr(todo_ui, "get_todo_stats", get_todo_stats)
+
+    for description in ("Buy milk", "Walk the dog", "Water the plants"):
+        user.find(ui.input).type(description)
+        user.find("Add Todo").click()
+
+    await user.should_see("Your Tasks (3)")
+    assert len(stats_reads) == 1
+
+
+async def test_toggle_todo_moves_it_between_sections(user: User, new_db) -> None:
+    """Test that toggling a todo moves its card to the other section"""
+    create_todo(TodoItemCreate(description="Buy milk"))
+    create_todo(TodoItemCreate(description="Walk the dog"))
+    await user.open("/")
+    assert shown_todos(user) == ["Pending", "Walk the dog", "Buy milk"]
+
+    click_in_card(user, "Buy milk", ui.checkbox)
+    assert shown_todos(user) == ["Pending", "Walk the dog", "Completed", "Buy milk"]
+
+    click_in_card(user, "Walk the dog", ui.checkbox)
+    assert shown_todos(user) == ["Completed", "Walk the dog", "Buy milk"]
+
+    click_in_card(user, "Buy milk", ui.checkbox)
+    assert shown_todos(user) == ["Pending", "Buy milk", "Completed", "Walk the dog"]
+    await user.should_see("Your Tasks (2)")
+
+
+async def test_delete_todo(user: User, new_db) -> None:
+    """Test that deleting todos removes their cards, down to the empty state"""
+    create_todo(TodoItemCreate(description="Buy milk"))
+    create_todo(TodoItemCreate(description="Walk the dog"))
+    await user.open("/")
+
+    click_in_card(user, "Buy milk", ui.button)
+    assert shown_todos(user) == ["Pending", "Walk the dog"]
+    await user.should_see("Your Tasks (1)")
+
+    click_in_card(user, "Walk the dog", ui.button)
+    await user.should_not_see("Your Tasks")
+    await user.should_not_see("Walk the dog")
+    assert empty_state_shown(user)
+
+
+async def test_scrolling_loads_next_page(user: User, new_db) -> None:
+    """Test that scrolling renders the next page, unaffected by todos added elsewhere meanwhile"""
+    descriptions = [f"Todo {i:03d}" for i in range(TODO_PAGE_SIZE + 10)]
+    for description in descriptions:
+        create_todo(TodoItemCreate(description=description))
+    await user.open("/")
+    assert shown_todos(user) == ["Pending", *reversed(descriptions[10:])]
+
+    # Another client adds a todo, so paging by offset would render one of the first page's todos again
+    create_todo(TodoItemCreate(description="Added elsewhere"))
+
+    scroll_to_bottom(user)
+    assert shown_todos(user) == ["Pending", *reversed(descriptions)]
+
+
+async def test_todo_toggled_elsewhere_is_shown_once(user: User, new_db) -> None:
+    """Test that a rendered todo completed by another client moves when it comes up in a later page"""
+    descriptions = [f"Todo {i:03d}" for i in range(TODO_PAGE_SIZE + 10)]
+    todos = [create_todo(TodoItemCreate(description=description)) for description in descriptions]
+    await user.open("/")
+
+    newest = todos[-1]
+    assert newest.id is not None
+    toggle_todo_completion(newest.id)
+
+    # The rest of the pending todos and then the first page of completed ones are loaded
+    scroll_to_bottom(user)
+    assert shown_todos(user) == ["Pending", *reversed(descriptions[:-1]), "Completed", newest.description]